@@ -24,18 +24,43 @@ import os
 import sys
 import csv
 import json
+import time
+import hashlib
+import functools
+from collections import Counter
+from contextlib import contextmanager
+import tempfile
+from pathlib import Path
 import fitz  # PyMuPDF
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
+import unicodedata
 import threading
-import difflib
+import queue
+try:
+    import orjson  # Optional: faster decoding of CrossRef responses
+except ImportError:
+    orjson = None
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, CancelledError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 
 # --- CONSTANTS ---
 
 CROSSREF_API = "https://api.crossref.org/works"
+# Only the fields the app reads, to keep search responses small
+CROSSREF_SELECT = ','.join([
+    'title', 'author', 'published-print', 'published-online', 'issued', 'created',
+    'container-title', 'short-container-title', 'score', 'DOI',
+])
 CROSSREF_HEADERS = {'User-Agent': 'PDFRenamer/2.0 (mailto:ebitzek@example.com)'}
 
 SETTINGS_PATH = os.path.join(os.path.expanduser("~"), ".paper_pdf_renamer.json")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdf-paper-renaming")
+# Cached CrossRef answers older than this are fetched again (e.g. papers not yet indexed before)
+CACHE_MAX_AGE_DAYS = 30
 
 DEFAULT_TEMPLATES = [
     "{Year}-{Author}-{Title}",
@@ -45,8 +70,26 @@ DEFAULT_TEMPLATES = [
     "{Year}-{Author}-{Journal}-{Tags}-{Title}",
 ]
 
-DOI_PATTERN = re.compile(r'10\.\d{4,9}/[-._;()/:A-Za-z0-9]+')
-DOI_WITH_PREFIX = re.compile(r'(?:doi[\s.:]{0,2})(10\.\d{4,9}/[-._;()/:A-Za-z0-9]+)', re.IGNORECASE)
+# Translation table deleting characters that are not allowed in filenames
+ILLEGAL_FILENAME_TABLE = str.maketrans('', '', '\\/*?:"<>|')
+# Same, additionally turning spaces into dashes for generated filenames
+GENERATED_FILENAME_TABLE = str.maketrans(' ', '-', '\\/*?:"<>|')
+
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+INLINE_SPACE_PATTERN = re.compile(r'[ \t]+')
+PRIVATE_USE_PATTERN = re.compile(r'[\ue000-\uf8ff]')  # Icon-font glyphs
+XML_TAG_PATTERN = re.compile(r'<[^>]+>')
+TITLE_WORD_PATTERN = re.compile(r'[a-z]{4,}')
+REPEATED_DASH_PATTERN = re.compile(r'-{2,}')
+
+# DOI with an optional "doi:" prefix in group 1, so a single scan finds both kinds
+DOI_PATTERN = re.compile(r'(doi[\s.:]{0,2})?(10\.\d{4,9}/[-._;()/:A-Za-z0-9]+)', re.IGNORECASE)
+
+# Placeholder titles that authoring tools write into the PDF Info dictionary
+INFO_TITLE_JUNK_PATTERN = re.compile(r'^(?:microsoft word|untitled)|\.(?:docx?|tex|dvi|pdf|ps)\b', re.IGNORECASE)
+INFO_AUTHOR_SEPARATOR_PATTERN = re.compile(r';|,|\band\b')
+INFO_YEAR_PATTERN = re.compile(r'^(?:D:)?(\d{4})')
+INFO_INITIALS_PATTERN = re.compile(r'^(?:[A-Z]{1,3}|(?:[A-Z]\.-?)+)$')  # "JA", "J.A.", "J.-A."
 
 BOILERPLATE_PATTERNS = [
     re.compile(r'https?://\S+'),
@@ -63,9 +106,124 @@ BOILERPLATE_PATTERNS = [
     re.compile(r'Published\s+by\s+\S+', re.IGNORECASE),
     re.compile(r'\bView\b\s*\n?\s*\bOnline\b', re.IGNORECASE),
     re.compile(r'\bExport\b\s*\n?\s*\bCitation\b', re.IGNORECASE),
+    re.compile(r'arXiv:\d{4}\.\d{4,5}(?:v\d+)?(?:\s*\[[^\]\n]*\])?(?:\s+\d{1,2}\s+[A-Za-z]{3}\s+\d{4})?', re.IGNORECASE),
 ]
 
-TITLE_MATCH_THRESHOLD = 0.4
+def _combine_patterns(patterns):
+    """Fuses compiled patterns into one alternation, keeping each pattern's case sensitivity."""
+    parts = []
+    for pattern in patterns:
+        flag = 'i' if pattern.flags & re.IGNORECASE else ''
+        parts.append(f'(?{flag}:{pattern.pattern})')
+    return re.compile('|'.join(parts))
+
+# All boilerplate patterns in one regex, so the text is scanned once instead of once per pattern
+BOILERPLATE_PATTERN = _combine_patterns(BOILERPLATE_PATTERNS)
+
+# Fraction of significant CrossRef title words that must appear in the PDF text
+TITLE_MATCH_THRESHOLD = 0.5
+TITLE_MATCH_LOW_THRESHOLD = 0.25
+
+# CrossRef relevance score below which a search hit is discarded without validation
+MIN_CROSSREF_SCORE = 40
+
+# Number of leading pages searched for identifying information
+MAX_PAGES = 2
+
+# Fraction of the page height (from the top) searched for title and author text
+HEADER_FRACTION = 0.45
+
+# Text extraction without image blocks, so figures on title pages are not decoded
+PAGE_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Number of PDFs identified concurrently; lookups are dominated by CrossRef latency
+MAX_WORKERS = 8
+
+# DOIs resolved per bulk CrossRef request; keeps the filter URL well below server limits
+DOI_BATCH_SIZE = 40
+
+# Batches at least this large parse their PDFs in a process pool instead of the lookup threads
+PROCESS_POOL_MIN_FILES = 50
+
+# Requests per second until CrossRef reports its actual limit in the response headers
+DEFAULT_RATE_LIMIT = 50
+
+# Interval (ms) at which the GUI thread applies results posted by the worker threads,
+# and the most results applied per interval so large batches do not freeze the window
+UI_POLL_MS = 50
+UI_MAX_UPDATES = 100
+
+# --- HTTP SESSION ---
+
+def _create_session():
+    """Creates a pooled, retrying HTTP session shared by all CrossRef requests."""
+    session = requests.Session()
+    session.headers.update(CROSSREF_HEADERS)
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_maxsize=MAX_WORKERS, max_retries=retries)
+    session.mount('https://', adapter)
+    return session
+
+SESSION = _create_session()
+
+def set_contact_email(email):
+    """Identifies the user to CrossRef so requests are served from the faster polite pool."""
+    SESSION.headers['User-Agent'] = f"PDFRenamer/2.0 (mailto:{email})"
+
+class RateLimiter:
+    """Token bucket shared by all worker threads, tuned from CrossRef's X-Rate-Limit headers."""
+
+    def __init__(self, limit, interval):
+        self._cond = threading.Condition()
+        self.capacity = float(limit)
+        self.tokens = float(limit)
+        self.refill_rate = limit / interval
+        self._last_refill = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        with self._cond:
+            self._refill()
+            while self.tokens < 1:
+                self._cond.wait(timeout=(1 - self.tokens) / self.refill_rate)
+                self._refill()
+            self.tokens -= 1
+
+    def update(self, headers):
+        """Adopts the limit advertised by the server, e.g. X-Rate-Limit-Limit: 50, X-Rate-Limit-Interval: 1s."""
+        try:
+            limit = float(headers['X-Rate-Limit-Limit'])
+            interval = float(headers['X-Rate-Limit-Interval'].rstrip('s'))
+        except (KeyError, ValueError):
+            return
+        if limit <= 0 or interval <= 0:
+            return
+        with self._cond:
+            self._refill()
+            self.capacity = limit
+            self.refill_rate = limit / interval
+            self.tokens = min(self.tokens, limit)
+            self._cond.notify_all()
+
+RATE_LIMITER = RateLimiter(DEFAULT_RATE_LIMIT, 1.0)
+
+def _crossref_get(url, **kwargs):
+    """Sends a rate-limited GET request through the shared session."""
+    RATE_LIMITER.acquire()
+    response = SESSION.get(url, **kwargs)
+    RATE_LIMITER.update(response.headers)
+    return response
+
+def _decode_json(response):
+    """Decodes a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 # --- RESOURCE AND SETTINGS HELPERS ---
 
@@ -132,115 +290,333 @@ def save_settings(settings):
     except Exception as e:
         print(f"Could not save settings: {e}")
 
+# --- CROSSREF RESPONSE CACHE ---
+
+# Entries read or written during this session, so repeated queries skip the disk
+_memory_cache = {}
+
+def _cache_path(name, text):
+    """Maps a query to its JSON file in the cache directory.
+    Case and whitespace are normalized, as CrossRef ignores both.
+    """
+    key = f"{name}:{' '.join(text.lower().split())}"
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+def _read_cache(path):
+    """Returns (True, result) for a fresh cache entry, otherwise (False, None)."""
+    if path in _memory_cache:
+        return True, _memory_cache[path]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if time.time() - entry['ts'] < CACHE_MAX_AGE_DAYS * 86400:
+            _memory_cache[path] = entry['result']
+            return True, entry['result']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return False, None
+
+def _write_cache(path, result):
+    """Atomically writes a cache entry so concurrent readers never see partial files."""
+    _memory_cache[path] = result
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'result': result, 'ts': time.time()}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write cache entry: {e}")
+
+# Queries currently being fetched, so that identical queries within a batch share one request
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def disk_cached(func):
+    """Caches a CrossRef query function on disk, keyed by a hash of its text argument.
+    Results of None (failed requests) are not cached; empty results are.
+    Concurrent calls with the same argument wait for the first one instead of re-querying.
+    """
+    @functools.wraps(func)
+    def wrapper(text_query):
+        if not text_query:
+            return func(text_query)
+        path = _cache_path(func.__name__, text_query)
+        hit, result = _read_cache(path)
+        if hit:
+            return result
+
+        with _inflight_lock:
+            future = _inflight.get(path)
+            is_owner = future is None
+            if is_owner:
+                future = _inflight[path] = Future()
+        if not is_owner:
+            return future.result()
+
+        try:
+            result = func(text_query)
+            if result is not None:
+                _write_cache(path, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                del _inflight[path]
+    return wrapper
+
 # --- TIER 1: DOI EXTRACTION ---
 
 def extract_doi(text):
     """Extracts a DOI from text, preferring explicit doi: prefixed ones."""
     if not text:
         return None
-    match = DOI_WITH_PREFIX.search(text)
-    if match:
-        doi = match.group(1)
-    else:
-        match = DOI_PATTERN.search(text)
-        if match:
-            doi = match.group(0)
-        else:
-            return None
+    doi = None
+    for match in DOI_PATTERN.finditer(text):
+        if match.group(1):
+            doi = match.group(2)
+            break
+        if doi is None:
+            doi = match.group(2)
+    if doi is None:
+        return None
     return doi.rstrip('.,;)')
 
+def extract_doi_from_metadata(doc):
+    """Extracts a DOI from the document's Info dictionary or XMP packet, without parsing any page."""
+    info = doc.metadata or {}
+    doi = extract_doi(" ".join(info.get(key) or '' for key in ('subject', 'keywords')))
+    if doi:
+        return doi
+    try:
+        return extract_doi(doc.get_xml_metadata())
+    except Exception:
+        return None
+
+@disk_cached
 def lookup_doi(doi):
-    """Looks up metadata directly via CrossRef /works/{doi} endpoint."""
+    """Looks up metadata directly via CrossRef /works/{doi} endpoint.
+    Callers pass lower-case DOIs so that cache entries are shared with lookup_dois_bulk.
+    """
     try:
         url = f"{CROSSREF_API}/{requests.utils.quote(doi, safe='')}"
-        response = requests.get(url, headers=CROSSREF_HEADERS, timeout=10)
+        response = _crossref_get(url, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = _decode_json(response)
         if data['status'] == 'ok' and 'message' in data:
             return _parse_crossref_item(data['message'])
     except requests.exceptions.RequestException as e:
         print(f"DOI lookup failed for {doi}: {e}")
-    except (KeyError, IndexError) as e:
+    except (KeyError, IndexError, ValueError) as e:
         print(f"Could not parse DOI response for {doi}: {e}")
     return None
 
+def lookup_dois_bulk(dois):
+    """Resolves many DOIs with a few /works?filter=doi:... requests, skipping cached ones.
+    Returns {doi_lower: metadata_or_None} for every DOI whose batch succeeded;
+    None marks DOIs CrossRef does not know. DOIs from failed batches are left out.
+    """
+    resolved = {}
+    dois_to_fetch = []
+    for doi in sorted({doi.lower() for doi in dois}):
+        hit, metadata = _read_cache(_cache_path('lookup_doi', doi))
+        if hit:
+            resolved[doi] = metadata
+        else:
+            dois_to_fetch.append(doi)
+
+    for start in range(0, len(dois_to_fetch), DOI_BATCH_SIZE):
+        batch = dois_to_fetch[start:start + DOI_BATCH_SIZE]
+        try:
+            params = {
+                'filter': ','.join(f'doi:{doi}' for doi in batch),
+                'rows': len(batch),
+                'select': CROSSREF_SELECT,
+            }
+            response = _crossref_get(CROSSREF_API, params=params, timeout=30)
+            response.raise_for_status()
+            data = _decode_json(response)
+            if data['status'] != 'ok':
+                continue
+            found = {item['DOI'].lower(): _parse_crossref_item(item)
+                     for item in data['message']['items']}
+        except requests.exceptions.RequestException as e:
+            print(f"Bulk DOI lookup failed: {e}")
+            continue
+        except (KeyError, IndexError, ValueError) as e:
+            print(f"Could not parse bulk DOI response: {e}")
+            continue
+        for doi in batch:
+            resolved[doi] = found.get(doi)
+            if resolved[doi] is not None:
+                _write_cache(_cache_path('lookup_doi', doi), resolved[doi])
+    return resolved
+
+def metadata_from_info(info):
+    """Builds metadata from the Info dictionary's title, author and creation date.
+    Returns (metadata, first_author_name), or (None, None) for missing or placeholder values
+    such as 'Microsoft Word - draft.docx'. Nothing here is checked against the page text yet.
+    """
+    title = ' '.join((info.get('title') or '').split())
+    author = (info.get('author') or '').strip()
+    year = INFO_YEAR_PATTERN.match(info.get('creationDate') or '')
+    if len(title) < 10 or not author or not year or INFO_TITLE_JUNK_PATTERN.search(title):
+        return None, None
+    # "Jane Zhang; Erik Bitzek", "Zhang, Jane" and "Zhang JA" all yield Zhang
+    first_author = INFO_AUTHOR_SEPARATOR_PATTERN.split(author)[0].split()
+    name = [word for word in first_author if not INFO_INITIALS_PATTERN.match(word)] or first_author
+    if not name:
+        return None, None
+    metadata = {
+        'year': year.group(1), 'author': name[-1], 'title': title,
+        'journal': '', 'journal_abbrev': '',
+    }
+    return metadata, ' '.join(name)
+
+def validate_info_match(pdf_lower, metadata, first_author_name):
+    """Rates Info dictionary metadata against the lower-cased first-page text.
+    'high' needs the title, the year and the first author's name as written in the Info
+    dictionary on the page; the latter confirms that its last word is the surname
+    (e.g. "Zhang Wei" printed as "Wei Zhang" is only 'low').
+    """
+    confidence = validate_match(pdf_lower, metadata)
+    if confidence == 'high' and (metadata['year'] not in pdf_lower or
+                                 first_author_name.lower() not in pdf_lower):
+        return 'low'
+    return confidence
+
 # --- TIER 2: FONT-SIZE TITLE EXTRACTION ---
 
-def extract_title_by_font(page):
-    """Extracts the paper title by finding the largest-font text on the page."""
+def get_page_data(page):
+    """Runs a single PyMuPDF dict extraction and derives everything the tiers read from a page.
+    Returns (plain_text, header_lines, spans); header_lines are the lines within HEADER_FRACTION
+    of the top, in reading order, and spans are lightweight (y, x, font_size, text) tuples.
+    Returns ('', [], []) if the page cannot be read.
+    """
     try:
-        d = page.get_text("dict")
+        d = page.get_text("dict", flags=PAGE_TEXT_FLAGS)
     except Exception:
-        return None
+        return '', [], []
 
+    header_bottom = page.rect.y0 + page.rect.height * HEADER_FRACTION
+    lines = []
+    header = []
     spans = []
     for block in d.get("blocks", []):
         if block.get("type") != 0:
             continue
         for line in block.get("lines", []):
-            for span in line.get("spans", []):
-                text = span.get("text", "").strip()
-                if len(text) < 3:
-                    continue
-                # Skip private-use Unicode (icon fonts)
-                if any(ord(c) >= 0xE000 for c in text):
-                    continue
-                spans.append(span)
-
-    if not spans:
+            line_spans = line.get("spans", [])
+            # Spans of one line are adjacent, as in get_text("text")
+            text = "".join(span.get("text", "") for span in line_spans)
+            lines.append(text)
+            spans.extend((span["bbox"][1], span["bbox"][0], span["size"], span["text"]) for span in line_spans)
+            bbox = line["bbox"]
+            if bbox[1] < header_bottom:
+                header.append((bbox[3], bbox[0], text))
+    header.sort(key=lambda h: (h[0], h[1]))
+    return "\n".join(lines), [h[2] for h in header], spans
+
+def extract_title_by_font(page_spans):
+    """Extracts the paper title by finding the largest-font text among a page's (y, x, size, text) spans."""
+    # Single pass keeping only the spans at the largest font size seen so far (within 0.5pt tolerance)
+    max_size = 0.0
+    title_spans = []
+    for span in page_spans:
+        text = span[3].strip()
+        if len(text) < 3:
+            continue
+        # Skip private-use Unicode (icon fonts)
+        if PRIVATE_USE_PATTERN.search(text):
+            continue
+        size = span[2]
+        if size > max_size:
+            # Drop the collected spans that are no longer within tolerance of the new maximum
+            title_spans = [s for s in title_spans if size - s[2] < 0.5]
+            max_size = size
+            title_spans.append(span)
+        elif max_size - size < 0.5:
+            title_spans.append(span)
+
+    if not title_spans:
         return None
 
-    max_size = max(s["size"] for s in spans)
-
-    # Collect spans at the largest font size (within 0.5pt tolerance)
-    title_spans = [s for s in spans if abs(s["size"] - max_size) < 0.5]
-
     # Sort by vertical position then horizontal
-    title_spans.sort(key=lambda s: (s["bbox"][1], s["bbox"][0]))
+    title_spans.sort()
 
-    title = " ".join(s["text"].strip() for s in title_spans)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = " ".join(word for s in title_spans for word in s[3].split())
 
     if len(title) < 10:
         return None
 
     return title
 
+def extract_title_by_line(header_text):
+    """Falls back to the first header line that reads like a title (at least 5 words, 20 chars)."""
+    if not header_text:
+        return None
+    for line in header_text.splitlines():
+        line = line.strip()
+        if len(line) >= 20 and len(line.split()) >= 5:
+            return line
+    return None
+
 # --- TIER 3: CLEANED TEXT EXTRACTION ---
 
-def extract_cleaned_text(page, max_chars=500):
-    """Extracts text from a page with boilerplate and noise removed."""
-    try:
-        text = page.get_text("text")
-    except Exception:
-        return None
+def extract_cleaned_text(header_lines, max_chars=500):
+    """Builds the header text (title, authors) of a page with boilerplate and noise removed."""
+    # Stop once there is enough text left over after boilerplate removal,
+    # instead of joining and slicing all header lines
+    lines = []
+    collected = 0
+    for line in header_lines:
+        if collected >= max_chars * 2:
+            break
+        lines.append(line)
+        collected += len(line) + 1
+    text = "\n".join(lines)
 
     # Remove private-use Unicode
-    text = re.sub(r'[\ue000-\uf8ff]', '', text)
+    text = PRIVATE_USE_PATTERN.sub('', text)
 
-    for pattern in BOILERPLATE_PATTERNS:
-        text = pattern.sub('', text)
+    text = BOILERPLATE_PATTERN.sub('', text)
 
     # Collapse whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
+    text = BLANK_LINES_PATTERN.sub('\n\n', text)
+    text = INLINE_SPACE_PATTERN.sub(' ', text)
     text = text.strip()
 
     return text[:max_chars] if text else None
 
 # --- CROSSREF SEARCH AND VALIDATION ---
 
+def _normalize_query(text, max_chars=500):
+    """Normalizes a search query so re-extracted text maps to the same query and cache entry:
+    NFKC (ligatures, full-width forms), single spaces, and cut at a word boundary.
+    """
+    text = ' '.join(unicodedata.normalize('NFKC', text).split())
+    if len(text) > max_chars:
+        cut = text.rfind(' ', 0, max_chars + 1)
+        text = text[:cut] if cut > 0 else text[:max_chars]
+    return text
+
+@disk_cached
 def search_crossref(text_query):
-    """Searches CrossRef API and returns top results with scores."""
+    """Searches CrossRef API and returns top results with scores.
+    Returns None if the request failed, so that failures are not cached.
+    """
     if not text_query:
         return []
     try:
-        params = {'query.bibliographic': text_query, 'rows': 3}
-        response = requests.get(CROSSREF_API, params=params,
-                                headers=CROSSREF_HEADERS, timeout=15)
+        params = {'query.bibliographic': text_query, 'rows': 1, 'select': CROSSREF_SELECT}
+        response = _crossref_get(CROSSREF_API, params=params, timeout=15)
         response.raise_for_status()
-        data = response.json()
-        if data['status'] == 'ok' and data['message']['items']:
+        data = _decode_json(response)
+        if data['status'] == 'ok':
             results = []
             for item in data['message']['items']:
                 parsed = _parse_crossref_item(item)
@@ -250,16 +626,15 @@ def search_crossref(text_query):
             return results
     except requests.exceptions.RequestException as e:
         print(f"API request failed: {e}")
-    except (KeyError, IndexError) as e:
+    except (KeyError, IndexError, ValueError) as e:
         print(f"Could not parse API response: {e}")
-    return []
+    return None
 
 def _parse_crossref_item(item):
     """Parses a single CrossRef API item into a metadata dict."""
     title = item.get('title', ['Untitled'])[0]
     # Strip MathML/XML tags from title
-    title = re.sub(r'<[^>]+>', '', title)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = ' '.join(XML_TAG_PATTERN.sub('', title).split())
 
     year = "UnknownYear"
     for date_field in ['published-print', 'published-online', 'published', 'issued', 'created']:
@@ -286,93 +661,268 @@ def _parse_crossref_item(item):
         'journal': journal, 'journal_abbrev': journal_abbrev,
     }
 
-def validate_match(pdf_text, crossref_result):
-    """Validates a CrossRef match against the PDF text. Returns a confidence string."""
-    if not crossref_result or not pdf_text:
+def validate_match(pdf_lower, crossref_result):
+    """Validates a CrossRef match against the lower-cased PDF text. Returns a confidence string."""
+    if not crossref_result or not pdf_lower:
         return 'none'
 
     cr_title = crossref_result.get('title', '').lower()
-    pdf_lower = pdf_text.lower()
 
     # Check how many significant words from the CrossRef title appear in the PDF
-    title_words = [w for w in re.findall(r'[a-z]{4,}', cr_title)]
+    title_words = TITLE_WORD_PATTERN.findall(cr_title)
     if not title_words:
         return 'low'
 
     found = sum(1 for w in title_words if w in pdf_lower)
     word_ratio = found / len(title_words)
 
-    # Also check sequence similarity
-    seq_ratio = difflib.SequenceMatcher(None, cr_title[:200], pdf_lower[:500]).ratio()
-
-    if word_ratio >= 0.5 or seq_ratio >= TITLE_MATCH_THRESHOLD:
+    if word_ratio >= TITLE_MATCH_THRESHOLD:
         return 'high'
-    elif word_ratio >= 0.25 or seq_ratio >= 0.25:
+    elif word_ratio >= TITLE_MATCH_LOW_THRESHOLD:
         return 'low'
     else:
         return 'none'
 
 # --- MAIN IDENTIFICATION PIPELINE ---
 
-def identify_paper(pdf_path):
-    """Runs the three-tier identification pipeline on a PDF.
-    Returns (metadata_dict, confidence_str, method_str) or (None, 'none', None).
-    """
+@contextmanager
+def open_pdf(pdf_path):
+    """Opens a PDF once for the duration of a with-block. Yields None if it cannot be opened."""
     try:
         doc = fitz.open(pdf_path)
     except Exception as e:
         print(f"Error opening PDF {pdf_path}: {e}")
-        return None, 'none', None
+        yield None
+        return
+    try:
+        yield doc
+    finally:
+        doc.close()
+
+def iter_pages(doc, max_pages=MAX_PAGES):
+    """Lazily yields (page_number, text, header_lines, spans) for the leading pages of an open document."""
+    for page_idx in range(min(doc.page_count, max_pages)):
+        page = doc.load_page(page_idx)
+        yield (page_idx + 1, *get_page_data(page))
+
+def extract_pdf_data(pdf_path):
+    """Extracts everything the identification tiers need from a PDF, without network access.
+    Returns a picklable dict (so it can run in a worker process), or None if the PDF cannot be opened
+    or has no pages.
+    """
+    with open_pdf(pdf_path) as doc:
+        if doc is None:
+            return None
+        if doc.page_count == 0:
+            print(f"PDF has no pages: {pdf_path}")
+            return None
+        pages = []
+        for page_num, full_text, header_lines, spans in iter_pages(doc):
+            cleaned = extract_cleaned_text(header_lines)
+            pages.append({
+                'number': page_num,
+                'text': full_text,
+                'doi': extract_doi(full_text),
+                'title': extract_title_by_font(spans) or extract_title_by_line(cleaned),
+                'cleaned': cleaned,
+            })
+        return {
+            'metadata_doi': extract_doi_from_metadata(doc),
+            'info': metadata_from_info(doc.metadata or {}),  # (metadata, first_author_name)
+            'pages': pages,
+        }
+
+def _init_parser_process():
+    """Runs once in each PDF parser process, so per-file work is only opening and reading PDFs."""
+    # MuPDF messages from several processes would interleave on stderr; parse_pdf reports failures
+    fitz.TOOLS.mupdf_display_errors(False)
+    fitz.TOOLS.mupdf_display_warnings(False)
+
+def parse_pdf(pdf_path, parser_pool=None):
+    """Runs extract_pdf_data, in parser_pool if one is given. Returns None on failure."""
+    try:
+        if parser_pool is not None:
+            try:
+                future = parser_pool.submit(extract_pdf_data, pdf_path)
+            except BrokenProcessPool:
+                # The pool broke on an earlier file; parse this one here instead
+                return extract_pdf_data(pdf_path)
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                # This file may be what crashed the parser, so don't retry it in the GUI process
+                print(f"Error reading PDF {pdf_path}: the parser process crashed")
+                return None
+        return extract_pdf_data(pdf_path)
+    except Exception as e:
+        print(f"Error reading PDF {pdf_path}: {e}")
+        return None
 
-    num_pages = min(doc.page_count, 2)
+def candidate_dois(pdf_data):
+    """Lists the DOIs found in a PDF, in the order the identification tiers try them."""
+    if pdf_data is None:
+        return []
+    dois = [pdf_data['metadata_doi']] + [page['doi'] for page in pdf_data['pages']]
+    return [doi for doi in dois if doi]
 
-    best_result = (None, 'none', None)
+def identify_from_data(pdf_data, known_dois=None, use_info=True):
+    """Runs the three-tier identification pipeline on data from extract_pdf_data.
+    known_dois holds results of lookup_dois_bulk; DOIs not in it are looked up one by one.
+    use_info=False skips the Info dictionary shortcut, e.g. when the journal name is needed.
+    Returns (metadata_dict, confidence_str, method_str) or (None, 'none', None).
+    """
+    if pdf_data is None:
+        return None, 'none', None
+    if known_dois is None:
+        known_dois = {}
 
-    for page_idx in range(num_pages):
-        page = doc[page_idx]
-        full_text = page.get_text("text")
+    best_result = (None, 'none', None)
+    tried_dois = set()
 
-        # Tier 1: DOI
-        doi = extract_doi(full_text)
-        if doi:
-            metadata = lookup_doi(doi)
-            if metadata:
-                doc.close()
-                return metadata, 'high', f'DOI (p{page_idx+1})'
+    def resolve(doi):
+        key = doi.lower()
+        if key in tried_dois:
+            return None
+        tried_dois.add(key)
+        if key in known_dois:
+            return known_dois[key]
+        return lookup_doi(key)
+
+    # Tier 0: DOI embedded in the document metadata by the publisher
+    doi = pdf_data['metadata_doi']
+    if doi:
+        metadata = resolve(doi)
+        if metadata:
+            return metadata, 'high', 'DOI (metadata)'
+
+    # Tier 1: DOIs printed on any of the pages, tried before any fuzzy search
+    for page in pdf_data['pages']:
+        if page['doi']:
+            metadata = resolve(page['doi'])
+            if not metadata:
+                continue
+            method = f"DOI (p{page['number']})"
+            if page['number'] == 1:
+                return metadata, 'high', method
+            # DOIs on later pages are often citations, so they must match the first page
+            confidence = validate_match(pdf_data['pages'][0]['text'].lower(), metadata)
+            if confidence == 'high':
+                return metadata, 'high', method
+            if confidence == 'low' and best_result[1] == 'none':
+                best_result = (metadata, 'low', method)
+
+    # Info dictionary title and author, trusted without a search if they are printed on the first page
+    info, first_author_name = pdf_data['info']
+    if use_info and info and pdf_data['pages']:
+        confidence = validate_info_match(pdf_data['pages'][0]['text'].lower(), info, first_author_name)
+        if confidence == 'high':
+            return info, 'high', 'PDF metadata'
+        if confidence == 'low' and best_result[1] == 'none':
+            best_result = (info, 'low', 'PDF metadata')
+
+    for page in pdf_data['pages']:
+        page_num = page['number']
+        # Lower-cased once per page for all validations against it
+        pdf_lower = page['text'].lower()
 
         # Tier 2: Title by font size
-        title = extract_title_by_font(page)
+        title = page['title']
         if title:
-            results = search_crossref(title)
-            if results:
+            results = search_crossref(_normalize_query(title))
+            if results and results[0].get('score', 0) >= MIN_CROSSREF_SCORE:
                 top = results[0]
-                confidence = validate_match(full_text, top)
+                confidence = validate_match(pdf_lower, top)
                 if confidence == 'high':
-                    doc.close()
-                    return top, 'high', f'Title (p{page_idx+1})'
+                    return top, 'high', f'Title (p{page_num})'
                 if confidence == 'low' and best_result[1] == 'none':
-                    best_result = (top, 'low', f'Title (p{page_idx+1})')
+                    best_result = (top, 'low', f'Title (p{page_num})')
 
         # Tier 3: Cleaned text
-        cleaned = extract_cleaned_text(page)
+        cleaned = page['cleaned']
         if cleaned:
-            results = search_crossref(cleaned)
-            if results:
+            results = search_crossref(_normalize_query(cleaned))
+            if results and results[0].get('score', 0) >= MIN_CROSSREF_SCORE:
                 top = results[0]
-                confidence = validate_match(full_text, top)
+                confidence = validate_match(pdf_lower, top)
                 if confidence == 'high':
-                    doc.close()
-                    return top, 'high', f'Text (p{page_idx+1})'
+                    return top, 'high', f'Text (p{page_num})'
                 if confidence == 'low' and best_result[1] == 'none':
-                    best_result = (top, 'low', f'Text (p{page_idx+1})')
+                    best_result = (top, 'low', f'Text (p{page_num})')
 
-    doc.close()
     return best_result
 
+def identify_paper(pdf_path):
+    """Runs the full identification pipeline on a single PDF.
+    Returns (metadata_dict, confidence_str, method_str) or (None, 'none', None).
+    """
+    return identify_from_data(parse_pdf(pdf_path))
+
+def _scan_names(directory):
+    """Lists a directory once, returning (exact_names, casefolded_name_counts) or None."""
+    try:
+        with os.scandir(directory) as entries:
+            names = {entry.name for entry in entries}
+    except OSError as e:
+        print(f"Could not list {directory}: {e}")
+        return None
+    return names, Counter(name.casefold() for name in names)
+
+def _name_taken(dir_names, old_path, new_path):
+    """Checks a directory listing for files that renaming old_path to new_path would clobber.
+    Without a listing, the O_EXCL claim in _move_no_clobber is the only check.
+    """
+    old_name, new_name = old_path.name, new_path.name
+    if new_name == old_name or dir_names is None:
+        return False
+    exact, folded = dir_names
+    if new_name in exact:
+        return True
+    if not folded[new_name.casefold()]:
+        return False
+    # A name differing only in case clashes only on case-insensitive (macOS/Windows) volumes
+    try:
+        return new_path.exists() and not os.path.samefile(old_path, new_path)
+    except OSError:
+        return True
+
+def _record_rename(dir_names, old_name, new_name):
+    """Updates a directory listing from _scan_names after old_name was renamed to new_name."""
+    if dir_names is None:
+        return
+    exact, folded = dir_names
+    exact.discard(old_name)
+    folded[old_name.casefold()] -= 1
+    if folded[old_name.casefold()] <= 0:
+        del folded[old_name.casefold()]
+    exact.add(new_name)
+    folded[new_name.casefold()] += 1
+
+def _move_no_clobber(src, dst):
+    """Moves src to dst without ever replacing another file; raises FileExistsError if dst exists.
+    The target name is claimed atomically with O_EXCL, so another program cannot take it
+    between the check and the move, and the file is then moved over the empty placeholder.
+    """
+    if src.name.casefold() == dst.name.casefold():
+        try:
+            same_file = os.path.samefile(src, dst)
+        except FileNotFoundError:
+            same_file = False
+        if same_file:
+            # Case-only change on a case-insensitive volume: dst "exists" as src itself
+            src.rename(dst)
+            return
+    fd = os.open(dst, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    os.close(fd)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        os.remove(dst)
+        raise
+
 def sanitize_filename(name):
     """Removes illegal characters from a string so it can be a valid filename."""
     base_name = name.replace('.pdf', '')
-    sanitized = re.sub(r'[\\/*?:"<>|]', "", base_name)
+    sanitized = base_name.translate(ILLEGAL_FILENAME_TABLE)
     return sanitized[:150]
 
 def format_new_filename(metadata, template=None, tags_str=""):
@@ -383,21 +933,21 @@ def format_new_filename(metadata, template=None, tags_str=""):
         template = DEFAULT_TEMPLATES[0]
 
     journal = get_journal_abbrev(metadata)
+    # Fields are only capped here; illegal characters are removed from the whole name in one pass below
     values = {
         '{Year}': metadata.get('year', 'UnknownYear'),
-        '{Author}': sanitize_filename(metadata.get('author', 'UnknownAuthor')),
-        '{Title}': sanitize_filename(metadata.get('title', 'Untitled')),
-        '{Journal}': sanitize_filename(journal) if journal else 'UnknownJournal',
-        '{Tags}': sanitize_filename(tags_str) if tags_str else '',
+        '{Author}': metadata.get('author', 'UnknownAuthor')[:150],
+        '{Title}': metadata.get('title', 'Untitled')[:150],
+        '{Journal}': journal[:150] if journal else 'UnknownJournal',
+        '{Tags}': tags_str[:150] if tags_str else '',
     }
     filename = template
     for placeholder, value in values.items():
         filename = filename.replace(placeholder, value)
+    filename = filename.replace('.pdf', '').translate(GENERATED_FILENAME_TABLE)
     # Clean up double/trailing separators from empty fields
-    filename = filename.replace(' ', '-')
-    filename = re.sub(r'-{2,}', '-', filename)
-    filename = filename.strip('-')
-    return sanitize_filename(filename) + ".pdf"
+    filename = REPEATED_DASH_PATTERN.sub('-', filename).strip('-')
+    return filename[:150] + ".pdf"
 
 # --- GUI APPLICATION CLASS ---
 
@@ -407,8 +957,17 @@ class PDFRenamerApp:
         self.root.title("Scientific PDF Renamer")
         self.root.geometry("1000x650")
 
-        self.file_list = []
+        self.file_list = {}  # Treeview iid -> file info
+        self.dir_names = {}  # Directory listings used to detect rename collisions
+        self.ui_queue = queue.Queue()  # (callback, args) posted by worker threads for the GUI thread
+        self.cancel_event = None  # Set while renaming; setting it stops the rename worker
+        self.processing = False  # True while a batch is being identified
+        self.parser_pool = None  # PDF parser processes, started on the first large batch and kept for later ones
+        self.lookup_pool = None  # Thread pool of the batch being identified
+        self.stop_event = threading.Event()  # Set when the window is closed; workers stop picking up files
         self.settings = load_settings()
+        if self.settings.get('mailto'):
+            set_contact_email(self.settings['mailto'])
         self.current_template = self.settings.get('template', DEFAULT_TEMPLATES[0])
 
         # Add the menu bar
@@ -471,6 +1030,20 @@ class PDFRenamerApp:
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W, padding="2 5")
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def on_close(self):
+        """Stops the background work and closes the window, so queued files don't keep the program alive."""
+        self.stop_event.set()
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        if self.lookup_pool is not None:
+            self.lookup_pool.shutdown(wait=False, cancel_futures=True)
+        if self.parser_pool is not None:
+            self.parser_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
     def create_menu(self):
         """Creates the main menu bar for the application."""
         menubar = tk.Menu(self.root)
@@ -537,19 +1110,56 @@ class PDFRenamerApp:
 
     def update_preview(self):
         """Re-formats all filenames in the treeview using the current template and tags."""
+        if self.cancel_event is not None:
+            # Renaming is running; the proposed names must stay as they were confirmed
+            return
         self._save_current_settings()
         tags_str = self._get_tags_str()
-        for file_info in self.file_list:
+        for file_info in self.file_list.values():
             metadata = file_info.get('metadata')
             if not metadata:
                 continue
-            status = self.tree.item(file_info['id'], 'values')[2]
-            if 'Manual Entry' in status:
+            if 'Manual Entry' in self.tree.set(file_info['id'], 'Status'):
                 continue
             new_filename = format_new_filename(metadata, self.current_template, tags_str)
-            file_info['new_path'] = os.path.join(file_info['original_dir'], new_filename)
-            original_name = self.tree.item(file_info['id'], 'values')[0]
-            self.tree.item(file_info['id'], values=(original_name, new_filename, status))
+            file_info['new_path'] = file_info['original_path'].with_name(new_filename)
+            self.tree.set(file_info['id'], 'New', new_filename)
+            self.tree.set(file_info['id'], 'Status', self._row_status(file_info))
+        self._number_duplicate_names()
+
+    def _row_status(self, file_info):
+        """Status text for an identified file. A name that would read UnknownJournal needs a review,
+        e.g. for a match from the PDF's Info dictionary after switching to a {Journal} template.
+        """
+        confidence = file_info['confidence']
+        if '{Journal}' in self.current_template and not get_journal_abbrev(file_info['metadata']):
+            confidence = 'low'
+        label = "Ready" if confidence == 'high' else "Low Confidence"
+        return f"{label} [{file_info['method']}]"
+
+    def _number_duplicate_names(self):
+        """Appends -v2, -v3, ... to generated names proposed for more than one file in a folder,
+        e.g. for a preprint and the published version of the same paper.
+        """
+        rows = [(item_id, self.file_list[item_id]) for item_id in self.tree.get_children()
+                if item_id in self.file_list and self.file_list[item_id]['new_path']]
+        # A file that already has its proposed name keeps it; only the files being moved are numbered
+        used = {(info['new_path'].parent, info['new_path'].name.casefold())
+                for _, info in rows if info['new_path'] == info['original_path']}
+        for item_id, file_info in rows:
+            path = file_info['new_path']
+            if path == file_info['original_path']:
+                continue
+            candidate = path
+            if 'Manual Entry' not in self.tree.set(item_id, 'Status'):
+                version = 1
+                while (candidate.parent, candidate.name.casefold()) in used:
+                    version += 1
+                    candidate = path.with_name(f"{path.stem}-v{version}{path.suffix}")
+            used.add((candidate.parent, candidate.name.casefold()))
+            if candidate != path:
+                file_info['new_path'] = candidate
+                self.tree.set(item_id, 'New', candidate.name)
 
     def select_files(self):
         """Opens a dialog to select PDF files and starts processing them."""
@@ -561,50 +1171,135 @@ class PDFRenamerApp:
 
         for i in self.tree.get_children(): self.tree.delete(i)
         self.file_list.clear()
+        self.dir_names = {}
         self.rename_button.config(state=tk.DISABLED)
+        self.select_button.config(state=tk.DISABLED)
+        self.processing = True
         self.status_var.set("Processing... This may take a moment.")
-        self.root.update_idletasks()
 
-        thread = threading.Thread(target=self.process_files, args=(filepaths,), daemon=True)
-        thread.start()
-
-    def process_files(self, filepaths):
-        """Processes each file to find metadata and suggests a new name."""
-        tags_str = self._get_tags_str()
+        # Insert all placeholder rows up front; the file path doubles as the row id
         for path in filepaths:
-            original_dir = os.path.dirname(path)
-            original_filename = os.path.basename(path)
-
-            item_id = self.tree.insert("", "end", values=(original_filename, "", "Processing..."))
-            self.root.update_idletasks()
+            self.tree.insert("", "end", iid=path, values=(Path(path).name, "", "Processing..."))
 
-            metadata, confidence, method = identify_paper(path)
-
-            file_info = {
-                'id': item_id,
-                'original_path': path,
-                'original_dir': original_dir,
-                'new_path': None,
-                'metadata': metadata,
-            }
-
-            if metadata and confidence == 'high':
-                new_filename = format_new_filename(metadata, self.current_template, tags_str)
-                file_info['new_path'] = os.path.join(original_dir, new_filename)
-                status = f"Ready [{method}]"
-                self.tree.item(item_id, values=(original_filename, new_filename, status))
-            elif metadata and confidence == 'low':
-                new_filename = format_new_filename(metadata, self.current_template, tags_str)
-                file_info['new_path'] = os.path.join(original_dir, new_filename)
-                status = f"Low Confidence [{method}]"
-                self.tree.item(item_id, values=(original_filename, new_filename, status))
-            else:
-                status = "Error: Not Found"
-                self.tree.item(item_id, values=(original_filename, "Double-click to enter name", status))
-
-            self.file_list.append(file_info)
+        tags_str = self._get_tags_str()
+        # The Info dictionary has no journal, so templates using it always search CrossRef
+        use_info = '{Journal}' not in self.current_template
+        thread = threading.Thread(target=self.process_files, args=(filepaths, tags_str, use_info), daemon=True)
+        thread.start()
 
-        if any(f['new_path'] for f in self.file_list):
+    def process_files(self, filepaths, tags_str, use_info=True):
+        """Identifies all files concurrently and posts each result to the GUI thread."""
+        parser_pool = self._get_parser_pool() if len(filepaths) >= PROCESS_POOL_MIN_FILES else None
+        stopped = self.stop_event.is_set
+        dir_names = {}  # Left empty on failure; the rename worker then lists the folders itself
+
+        # Not a with block: its exit waits for every queued file, even after the window is closed
+        pool = self.lookup_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            # Phase 1: read every PDF
+            parsed = list(pool.map(lambda path: None if stopped() else parse_pdf(path, parser_pool), filepaths))
+            pdf_data = dict(zip(filepaths, parsed))
+            if stopped():
+                return
+
+            # Phase 2: resolve all DOIs found in the batch with a few bulk requests
+            known_dois = lookup_dois_bulk({doi for data in parsed for doi in candidate_dois(data)})
+
+            # Phase 3: per-file lookups, which only hit the network for files without a resolved DOI
+            def identify(path):
+                if stopped():
+                    return None, 'none', None
+                return identify_from_data(pdf_data[path], known_dois, use_info)
+
+            futures = {pool.submit(identify, path): path for path in filepaths}
+            for future in as_completed(futures):
+                if stopped():
+                    return
+                path = futures[future]
+                try:
+                    metadata, confidence, method = future.result()
+                except Exception as e:
+                    print(f"Error identifying {path}: {e}")
+                    metadata, confidence, method = None, 'none', None
+                self.ui_queue.put((self._update_row, (path, metadata, confidence, method, tags_str)))
+
+            # List the directories now, so that applying the renames needs no extra disk round trips
+            dir_names = {directory: _scan_names(directory) for directory in {Path(p).parent for p in filepaths}}
+        except CancelledError:
+            # on_close cancelled the queued files
+            pass
+        except Exception as e:
+            print(f"Error processing files: {e}")
+        finally:
+            pool.shutdown(wait=False)
+            # Always re-enable the buttons, even if the batch failed
+            self.ui_queue.put((self._finish_processing, (dir_names,)))
+
+    def _drain_ui_queue(self):
+        """Applies results posted by the worker threads, then reschedules itself. Runs on the GUI thread."""
+        try:
+            for _ in range(UI_MAX_UPDATES):
+                try:
+                    callback, args = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+        finally:
+            # Keep polling even if one update failed, or the buttons would never be re-enabled
+            self.root.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def _get_parser_pool(self):
+        """Returns the PDF parser process pool, starting it (again, if it broke) when needed.
+        Starting the processes re-imports the script, so the pool is reused across batches.
+        """
+        if self.parser_pool is not None:
+            try:
+                self.parser_pool.submit(int)
+            except BrokenProcessPool:
+                self.parser_pool = None
+        if self.parser_pool is None:
+            # Spawn rather than fork: forking a process that runs Tk and worker threads is unsafe
+            self.parser_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'),
+                                                   initializer=_init_parser_process)
+        return self.parser_pool
+
+    def _update_row(self, path, metadata, confidence, method, tags_str):
+        """Shows the identification result for one file. Runs on the GUI thread."""
+        item_id = path
+        original_path = Path(path)
+
+        file_info = {
+            'id': item_id,
+            'original_path': original_path,
+            'new_path': None,
+            'metadata': metadata,
+            'confidence': confidence,
+            'method': method,
+        }
+
+        if metadata and confidence in ('high', 'low'):
+            new_filename = format_new_filename(metadata, self.current_template, tags_str)
+            file_info['new_path'] = original_path.with_name(new_filename)
+            status = self._row_status(file_info)
+        else:
+            new_filename = "Double-click to enter name"
+            status = "Error: Not Found"
+        # The original name was filled in on insert; only the other columns change
+        self.tree.set(item_id, 'New', new_filename)
+        self.tree.set(item_id, 'Status', status)
+
+        self.file_list[item_id] = file_info
+
+    def _finish_processing(self, dir_names):
+        """Enables renaming once all files have been processed. Runs on the GUI thread."""
+        self.processing = False
+        self.dir_names = dir_names
+        self._number_duplicate_names()
+        if self.cancel_event is not None:
+            # A rename is still running; _finish_renaming restores the buttons
+            return
+        self.select_button.config(state=tk.NORMAL)
+        if any(f['new_path'] for f in self.file_list.values()):
             self.rename_button.config(state=tk.NORMAL)
             self.status_var.set("Review proposed names or double-click items to edit. Click 'Apply Renaming' when ready.")
         else:
@@ -613,7 +1308,7 @@ class PDFRenamerApp:
     def on_double_click(self, event):
         """Handles manual renaming when a user double-clicks a failed or low-confidence item."""
         item_id = self.tree.identify_row(event.y)
-        if not item_id: return
+        if not item_id or self.cancel_event is not None: return
 
         current_values = self.tree.item(item_id, 'values')
         if not current_values:
@@ -634,44 +1329,85 @@ class PDFRenamerApp:
 
             if new_name and new_name.strip():
                 final_name = sanitize_filename(new_name) + ".pdf"
-                self.tree.item(item_id, values=(original_name, final_name, "Manual Entry"))
-                for file_info in self.file_list:
-                    if file_info['id'] == item_id:
-                        file_info['new_path'] = os.path.join(file_info['original_dir'], final_name)
-                        break
+                self.tree.set(item_id, 'New', final_name)
+                self.tree.set(item_id, 'Status', "Manual Entry")
+                file_info = self.file_list[item_id]
+                file_info['new_path'] = file_info['original_path'].with_name(final_name)
+                if self.processing:
+                    # _finish_processing enables renaming once the whole batch is identified
+                    return
                 self.rename_button.config(state=tk.NORMAL)
                 self.status_var.set("Manual entry saved. Click 'Apply Renaming' when ready.")
 
     def rename_files(self):
-        """Performs the actual file renaming based on the processed list."""
+        """Confirms the renaming and runs it on a worker thread, turning the rename button into Cancel."""
         if not messagebox.askyesno("Confirm Renaming", "Are you sure you want to rename these files?\nThis action cannot be undone."):
             return
 
+        # Snapshot the planned renames so edits made while renaming cannot race the worker
+        # In list order, so that the file shown first gets the unnumbered name
+        jobs = [(info['id'], info['original_path'], info['new_path'])
+                for info in map(self.file_list.get, self.tree.get_children()) if info and info['new_path']]
+        self.cancel_event = threading.Event()
+        self.select_button.config(state=tk.DISABLED)
+        # The pattern and tags would rewrite the proposed names of rows being renamed
+        self.template_combo.config(state=tk.DISABLED)
+        self.tags_entry.config(state=tk.DISABLED)
+        self.rename_button.config(text="Cancel Renaming", command=self.cancel_event.set)
         self.status_var.set("Renaming files...")
+        thread = threading.Thread(target=self._rename_worker, args=(jobs, self.dir_names, self.cancel_event), daemon=True)
+        thread.start()
+
+    def _rename_worker(self, jobs, dir_names, cancel_event):
+        """Renames the files one by one until done or cancelled, posting each result to the GUI thread."""
         success_count = 0
         fail_count = 0
 
-        for file_info in self.file_list:
-            if file_info['new_path']:
-                try:
-                    if os.path.exists(file_info['new_path']) and file_info['original_path'] != file_info['new_path']:
-                        self.tree.item(file_info['id'], values=(self.tree.item(file_info['id'])['values'][0], self.tree.item(file_info['id'])['values'][1], "Error: Name exists"))
-                        fail_count += 1
-                        continue
-                    
-                    os.rename(file_info['original_path'], file_info['new_path'])
-                    self.tree.item(file_info['id'], values=(self.tree.item(file_info['id'])['values'][0], self.tree.item(file_info['id'])['values'][1], "Renamed!"))
-                    success_count += 1
-                except OSError as e:
-                    self.tree.item(file_info['id'], values=(self.tree.item(file_info['id'])['values'][0], self.tree.item(file_info['id'])['values'][1], "Error: OS Denied"))
-                    print(f"Failed to rename {file_info['original_path']}: {e}")
+        # Directories are normally listed at the end of processing; list any that are missing
+        for _, original_path, _ in jobs:
+            if original_path.parent not in dir_names:
+                dir_names[original_path.parent] = _scan_names(original_path.parent)
+
+        for item_id, original_path, new_path in jobs:
+            if cancel_event.is_set():
+                break
+            names = dir_names[original_path.parent]
+            old_name = original_path.name
+            new_name = new_path.name
+            try:
+                if _name_taken(names, original_path, new_path):
+                    status = "Error: Name exists"
                     fail_count += 1
-        
-        self.status_var.set(f"Renaming complete. Success: {success_count}, Failed: {fail_count}.")
-        self.rename_button.config(state=tk.DISABLED)
+                else:
+                    _move_no_clobber(original_path, new_path)
+                    _record_rename(names, old_name, new_name)
+                    status = "Renamed!"
+                    success_count += 1
+            except FileExistsError:
+                status = "Error: Name exists"
+                fail_count += 1
+            except OSError as e:
+                status = "Error: OS Denied"
+                print(f"Failed to rename {original_path}: {e}")
+                fail_count += 1
+            self.ui_queue.put((functools.partial(self.tree.set, item_id, 'Status', status), ()))
+
+        self.ui_queue.put((self._finish_renaming, (success_count, fail_count, cancel_event.is_set())))
+
+    def _finish_renaming(self, success_count, fail_count, cancelled):
+        """Restores the buttons and reports the outcome. Runs on the GUI thread."""
+        self.cancel_event = None
+        self.rename_button.config(text="2. Apply Renaming", command=self.rename_files, state=tk.DISABLED)
+        self.template_combo.config(state="readonly")
+        self.tags_entry.config(state=tk.NORMAL)
+        if not self.processing:
+            self.select_button.config(state=tk.NORMAL)
+        outcome = "cancelled" if cancelled else "complete"
+        self.status_var.set(f"Renaming {outcome}. Success: {success_count}, Failed: {fail_count}.")
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the PDF parser processes in frozen builds
     try:
         import fitz
         import requests